@@ -11,15 +11,25 @@ Features:
 """
 
 import os
-import json
+import re
+import copy
+import sqlite3
+import atexit
 import logging
 import random
 import time
 import asyncio
+import heapq
+import html
+import orjson
 import pytz
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Set, Any
+from collections import Counter
+from contextlib import closing
+from datetime import datetime, timedelta, time as dt_time
+from typing import Dict, FrozenSet, List, Optional, Tuple, Set, Any
 from enum import Enum
+from dataclasses import dataclass, replace
+from functools import lru_cache
 from dotenv import load_dotenv
 from telegram import (
     Update, InlineKeyboardButton, InlineKeyboardMarkup,
@@ -30,6 +40,7 @@ from telegram.ext import (
     ContextTypes, CallbackContext, CallbackQueryHandler,
     JobQueue, Job, ConversationHandler
 )
+from telegram.helpers import escape_markdown
 
 # Load environment variables
 load_dotenv()
@@ -43,53 +54,98 @@ class UserRole(Enum):
     MODERATOR = "moderator"
     ADMIN = "admin"
 
+# Configuration
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Bot configuration, read and validated once from environment variables."""
+    token: str
+    admin_ids: FrozenSet[int]
+    moderator_ids: FrozenSet[int]
+    ai_enabled: bool
+    ai_provider: str
+    openai_api_key: str
+    ai_model: str
+    ai_temperature: float
+    max_tokens: int
+    data_dir: str
+    default_language: str
+    rate_limit_default_limit: int
+    rate_limit_admin_limit: int
+    rate_limit_window: int
+    
+    @classmethod
+    def from_env(cls) -> "Config":
+        """Build the configuration from environment variables."""
+        def parse_ids(name: str) -> FrozenSet[int]:
+            return frozenset(int(x.strip()) for x in os.getenv(name, "").split(",") if x.strip())
+        
+        return cls(
+            token=os.getenv("TELEGRAM_BOT_TOKEN", ""),
+            admin_ids=parse_ids("ADMIN_IDS"),
+            moderator_ids=parse_ids("MODERATOR_IDS"),
+            ai_enabled=os.getenv("AI_ENABLED", "True").lower() == "true",
+            ai_provider=os.getenv("AI_PROVIDER", "openai"),
+            openai_api_key=os.getenv("OPENAI_API_KEY", ""),
+            ai_model=os.getenv("AI_MODEL", "gpt-3.5-turbo"),
+            ai_temperature=float(os.getenv("AI_TEMPERATURE", "0.7")),
+            max_tokens=int(os.getenv("MAX_TOKENS", "1000")),
+            data_dir=os.getenv("DATA_DIR", "data"),
+            default_language=os.getenv("DEFAULT_LANGUAGE", "en"),
+            rate_limit_default_limit=int(os.getenv("RATE_LIMIT_DEFAULT", "10")),
+            rate_limit_admin_limit=int(os.getenv("RATE_LIMIT_ADMIN", "30")),
+            rate_limit_window=int(os.getenv("RATE_LIMIT_WINDOW", "60")),
+        )
+
 # Configuration from environment variables
-TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
-ADMIN_IDS = [int(x.strip()) for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip()]
-MODERATOR_IDS = [int(x.strip()) for x in os.getenv("MODERATOR_IDS", "").split(",") if x.strip()]
-
-# AI Configuration
-AI_ENABLED = os.getenv("AI_ENABLED", "True").lower() == "true"
-AI_PROVIDER = os.getenv("AI_PROVIDER", "openai")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-AI_MODEL = os.getenv("AI_MODEL", "gpt-3.5-turbo")
-AI_TEMPERATURE = float(os.getenv("AI_TEMPERATURE", "0.7"))
-MAX_TOKENS = int(os.getenv("MAX_TOKENS", "1000"))
+CONFIG = Config.from_env()
+
+AI_SYSTEM_MESSAGE = {"role": "system", "content": "You are a helpful AI assistant in a Telegram bot. "
+                                               "Be concise, friendly, and helpful in your responses."}
+
+# Per-user system messages for AI requests, rebuilt when the profile changes
+_SYSTEM_MSG_CACHE: Dict[int, List[dict]] = {}
 
 # Import AI modules if enabled
 openai_client = None
-if AI_ENABLED and AI_PROVIDER == "openai":
+if CONFIG.ai_enabled and CONFIG.ai_provider == "openai":
     try:
-        from openai import OpenAI
-        if OPENAI_API_KEY:
-            openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        from openai import AsyncOpenAI
+        if CONFIG.openai_api_key:
+            openai_client = AsyncOpenAI(api_key=CONFIG.openai_api_key)
         else:
             print("Warning: OPENAI_API_KEY not set. AI features will be disabled.")
-            AI_ENABLED = False
+            CONFIG = replace(CONFIG, ai_enabled=False)
     except ImportError:
         print("Warning: openai package not installed. Install with: pip install openai"
               "\nAI features will be disabled.")
-        AI_ENABLED = False
+        CONFIG = replace(CONFIG, ai_enabled=False)
 
-DATA_DIR = os.getenv("DATA_DIR", "data")
+DATA_DIR = CONFIG.data_dir
+# Legacy users file, imported into the database on first start
 USERS_FILE = os.path.join(DATA_DIR, "users.json")
-CHAT_HISTORY_FILE = os.path.join(DATA_DIR, "chat_history.txt")
+CHAT_HISTORY_DIR = os.path.join(DATA_DIR, "chat_history")
 COMMAND_LOGS = os.path.join(DATA_DIR, "command_logs.txt")
-FEEDBACK_FILE = os.path.join(DATA_DIR, "feedback.json")
-REMINDERS_FILE = os.path.join(DATA_DIR, "reminders.json")
-BROADCASTS_FILE = os.path.join(DATA_DIR, "broadcasts.json")
-
-# Rate limiting
-RATE_LIMIT = {
-    'default': {'limit': int(os.getenv("RATE_LIMIT_DEFAULT", "10")), 
-                'per_seconds': int(os.getenv("RATE_LIMIT_WINDOW", "60"))},
-    'admin': {'limit': int(os.getenv("RATE_LIMIT_ADMIN", "30")), 
-              'per_seconds': int(os.getenv("RATE_LIMIT_WINDOW", "60"))},
-}
+FEEDBACK_FILE = os.path.join(DATA_DIR, "feedback.jsonl")
+BROADCASTS_FILE = os.path.join(DATA_DIR, "broadcasts.jsonl")
+DB_FILE = os.path.join(DATA_DIR, "bot.db")
+
+# Messages per second for broadcasts and other fan-out sends
+SEND_RATE_LIMIT = 25
+
+# Last second formatted by iso_now() and its ISO string
+_ISO_NOW_SECOND = 0
+_ISO_NOW_VALUE = ""
+
+# Pending messages per chat, drained by one worker task per active chat
+_CHAT_QUEUES: Dict[int, asyncio.Queue] = {}
+
+# Token buckets per user: (available tokens, last refill time)
+_BUCKETS: Dict[int, Tuple[float, float]] = {}
 
 # Supported languages with their respective translations
 LANGUAGES = {
     'en': {
+        'flag': '🇺🇸',
         'welcome': '👋 Hello {}! Welcome to our bot!',
         'help': '🤖 *Available Commands:*',
         'admin_commands': '👑 *Admin Commands:*',
@@ -97,6 +153,7 @@ LANGUAGES = {
         'user_commands': '👤 *User Commands:*',
     },
     'es': {
+        'flag': '🇪🇸',
         'welcome': '👋 ¡Hola {}! ¡Bienvenido a nuestro bot!',
         'help': '🤖 *Comandos disponibles:*',
         'admin_commands': '👑 *Comandos de administrador:*',
@@ -107,7 +164,115 @@ LANGUAGES = {
 }
 
 # Default language
-DEFAULT_LANGUAGE = os.getenv("DEFAULT_LANGUAGE", "en")
+DEFAULT_LANGUAGE = CONFIG.default_language
+
+# Help text sections per language, built once at startup
+_HELP_USER = {
+    lang: (
+        f"{texts['help']}\n\n"
+        "• /start - Show welcome message\n"
+        "• /help - Show this help message\n"
+        "• /profile - View and edit your profile\n"
+        "• /chat - Start AI chat mode\n"
+        "• /contact - Contact information\n"
+        "• /feedback - Send us your feedback\n"
+        "• /language - Change language\n"
+        "• /remindme - Set a reminder\n"
+        "• /myinfo - Show your information\n"
+    )
+    for lang, texts in LANGUAGES.items()
+}
+_HELP_MODERATOR = {
+    lang: (
+        f"\n{texts['moderator_commands']}\n"
+        "• /broadcast - Send message to all users\n"
+        "• /userinfo - Get user information\n"
+    )
+    for lang, texts in LANGUAGES.items()
+}
+_HELP_ADMIN = {
+    lang: (
+        f"\n{texts['admin_commands']}\n"
+        "• /stats - Show bot statistics\n"
+        "• /export - Export user data\n"
+        "• /announce - Make an announcement\n"
+    )
+    for lang, texts in LANGUAGES.items()
+}
+
+# Inline keyboards that are the same for every user
+_HELP_ACTIONS = [
+    [InlineKeyboardButton("💬 Start Chat", callback_data="start_chat"),
+     InlineKeyboardButton("📝 Feedback", callback_data="give_feedback")],
+    [InlineKeyboardButton("⚙️ Settings", callback_data="settings")]
+]
+_HELP_KEYBOARD_USER = InlineKeyboardMarkup(_HELP_ACTIONS)
+_HELP_KEYBOARD_MODERATOR = InlineKeyboardMarkup(
+    _HELP_ACTIONS + [[InlineKeyboardButton("👥 User Management", callback_data="user_management")]]
+)
+_PROFILE_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("✏️ Edit Profile", callback_data="edit_profile")],
+    [InlineKeyboardButton("🔙 Back to Menu", callback_data="back_to_menu")]
+])
+_EDIT_PROFILE_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📝 Bio", callback_data="edit_bio")],
+    [InlineKeyboardButton("📍 Location", callback_data="edit_location")],
+    [InlineKeyboardButton("🎯 Interests", callback_data="edit_interests")],
+    [InlineKeyboardButton("🔙 Back to Profile", callback_data="back_to_profile")]
+])
+
+# Default record for new users; copied and filled in by get_user_data
+_DEFAULT_USER_TEMPLATE = {
+    "chat_mode": False,
+    "first_seen": None,
+    "last_seen": None,
+    "message_count": 0,
+    "language": DEFAULT_LANGUAGE,
+    "role": UserRole.USER.value,
+    "profile": {
+        "full_name": "",
+        "username": "",
+        "bio": "",
+        "location": "",
+        "interests": [],
+        "preferred_topics": [],
+        "last_activity": None
+    },
+    "settings": {
+        "notifications": True,
+        "daily_digest": False,
+        "privacy": {
+            "show_last_seen": True,
+            "show_join_date": True,
+            "show_activity_stats": True
+        },
+        "theme": "system"  # system/light/dark
+    },
+    "stats": {
+        "commands_used": 0,
+        "messages_sent": 0,
+        "media_sent": 0,
+        "stickers_sent": 0,
+        "voice_messages": 0,
+        "active_days": 1,
+        "last_command": None,
+        "last_command_time": None,
+        "favorite_commands": {}
+    },
+    "achievements": {
+        "welcome": False,
+        "early_adopter": False,
+        "active_user": False,
+        "feedback_provider": False,
+        "power_user": False
+    },
+    "metadata": {
+        "referral_code": "",
+        "referred_by": "",
+        "devices": [],
+        "timezone": "UTC"
+    }
+}
 
 # Set up logging
 logging.basicConfig(
@@ -117,19 +282,144 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Ensure data directory and files exist
-os.makedirs(DATA_DIR, exist_ok=True)
-for file_path in [USERS_FILE, CHAT_HISTORY_FILE, COMMAND_LOGS, FEEDBACK_FILE, REMINDERS_FILE, BROADCASTS_FILE]:
+os.makedirs(CHAT_HISTORY_DIR, exist_ok=True)
+for file_path in [COMMAND_LOGS, FEEDBACK_FILE, BROADCASTS_FILE]:
     if not os.path.exists(file_path):
-        with open(file_path, 'w', encoding='utf-8') as f:
-            if file_path.endswith('.json'):
-                if 'reminders' in file_path or 'broadcasts' in file_path:
-                    json.dump([], f, ensure_ascii=False, indent=2)
-                else:
-                    json.dump({}, f, ensure_ascii=False, indent=2)
-            else:
-                f.write('')
-
-def get_ai_response(user_input: str, user_id: int) -> str:
+        with open(file_path, 'wb') as f:
+            pass
+
+def _init_db() -> None:
+    """Create the database tables if they don't exist."""
+    with closing(sqlite3.connect(DB_FILE)) as conn, conn:
+        conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY,
+                data BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS reminders (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                chat_id INTEGER NOT NULL,
+                due REAL NOT NULL,
+                message TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_reminders_due ON reminders (due);
+            """
+        )
+
+_init_db()
+
+def _jload(path: str) -> Any:
+    """Read and parse a JSON file."""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+def _count_lines(path: str) -> int:
+    """Count the lines in a file without loading it into memory."""
+    with open(path, 'rb') as f:
+        return sum(1 for _ in f)
+
+def _append_record(path: str, record: dict) -> None:
+    """Append a record to a JSON Lines file."""
+    with open(path, 'ab') as f:
+        f.write(orjson.dumps(record, default=str, option=orjson.OPT_APPEND_NEWLINE))
+
+def _load_users() -> dict:
+    """
+    Load all users from the database into memory, importing a legacy users.json once.
+    
+    Unreadable data is raised rather than skipped: a user missing from the cache would get a
+    fresh default record that the next flush writes over their stored row.
+    """
+    users = {}
+    with closing(sqlite3.connect(DB_FILE)) as conn:
+        for user_id, data in conn.execute("SELECT id, data FROM users"):
+            try:
+                users[str(user_id)] = orjson.loads(data)
+            except orjson.JSONDecodeError:
+                logger.error("Unreadable data for user %s in %s", user_id, DB_FILE)
+                raise
+    if not users and os.path.exists(USERS_FILE):
+        users = _jload(USERS_FILE)
+        _migrate_timestamps(users)
+        _save_users(users)
+        logger.info("Imported %d users from %s", len(users), USERS_FILE)
+    return users
+
+def _user_rows(users: dict) -> List[Tuple[int, bytes]]:
+    """Serialize users into (id, data) database rows."""
+    return [(int(user_id), orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS))
+            for user_id, data in users.items()]
+
+def _save_user_rows(rows: List[Tuple[int, bytes]]) -> None:
+    """Insert or update serialized user rows in the database."""
+    with closing(sqlite3.connect(DB_FILE)) as conn, conn:
+        conn.executemany("INSERT OR REPLACE INTO users (id, data) VALUES (?, ?)", rows)
+
+def _save_users(users: dict) -> None:
+    """Insert or update the given users in the database."""
+    _save_user_rows(_user_rows(users))
+
+def _migrate_timestamps(users: dict) -> Set[str]:
+    """Convert ISO first_seen/last_seen strings from older data to epoch seconds (0 if malformed)."""
+    migrated = set()
+    for user_id_str, user_data in users.items():
+        for key in ('first_seen', 'last_seen'):
+            if isinstance(user_data.get(key), str):
+                try:
+                    user_data[key] = datetime.fromisoformat(user_data[key]).timestamp()
+                except (ValueError, TypeError):
+                    logger.warning("Invalid %s %r for user %s, resetting to 0", key, user_data[key], user_id_str)
+                    user_data[key] = 0
+                migrated.add(user_id_str)
+    return migrated
+
+def day_number(timestamp: float) -> int:
+    """Get the UTC day number of an epoch timestamp, matching the daily jobs' schedule."""
+    return int(timestamp // 86400)
+
+# In-memory users store; changes are written back by the debounced flusher
+USERS_FLUSH_DELAY = 0.5
+_USERS_CACHE: Dict[str, dict] = _load_users()
+_DIRTY: Set[str] = _migrate_timestamps(_USERS_CACHE)
+_flush_event = asyncio.Event()
+if _DIRTY:
+    _flush_event.set()
+
+@dataclass
+class DailyStats:
+    """Activity counters for the current day, updated as events happen."""
+    new_users: int = 0
+    active_users: int = 0
+    messages: int = 0
+
+def _seed_daily_stats(users: dict) -> DailyStats:
+    """Count today's new and active users once at startup."""
+    today = day_number(time.time())
+    return DailyStats(
+        new_users=sum(1 for u in users.values() if day_number(u.get('first_seen') or 0) == today),
+        active_users=sum(1 for u in users.values() if day_number(u.get('last_seen') or 0) == today),
+    )
+
+# Counters reported and reset by the daily stats job
+_DAILY_STATS = _seed_daily_stats(_USERS_CACHE)
+
+# Users per role, counted once at startup and kept in sync by get_user_data and set_user_role
+_ROLE_COUNTS = Counter(u.get('role', UserRole.USER.value) for u in _USERS_CACHE.values())
+
+# Long-lived buffered log handles, flushed periodically by the log flusher
+LOG_FLUSH_INTERVAL = 2
+LOG_BUFFER_SIZE = 1 << 16
+_CMD_COUNT = _count_lines(COMMAND_LOGS)
+_CMD_LOG_FH = open(COMMAND_LOGS, 'a', buffering=LOG_BUFFER_SIZE, encoding='utf-8')
+
+# Open chat history handles keyed by date (YYYY-MM-DD), one file per day
+_CHAT_LOG_FHS: Dict[str, Any] = {}
+
+async def get_ai_response(user_input: str, user_id: int) -> str:
     """
     Get a response from the configured AI provider.
     
@@ -140,40 +430,26 @@ def get_ai_response(user_input: str, user_id: int) -> str:
     Returns:
         str: The AI's response
     """
-    if not AI_ENABLED:
+    if not CONFIG.ai_enabled:
         return "⚠️ AI features are currently disabled. Please contact the bot administrator."
     
-    user_data = get_user_data(user_id)
-    
     try:
-        if AI_PROVIDER == "openai":
-            # Get user context for more personalized responses
-            user_context = (
-                f"You are chatting with {user_data.get('profile', {}).get('full_name', 'a user')}. "
-                f"Their interests include: {', '.join(user_data.get('profile', {}).get('interests', [])) or 'not specified'}. "
-                f"They are from {user_data.get('profile', {}).get('location', 'an unknown location')}."
-            )
+        if CONFIG.ai_provider == "openai":
+            # System messages are cached per user until their profile changes
+            messages = get_system_messages(user_id) + [{"role": "user", "content": user_input}]
             
-            # Create messages with context
-            messages = [
-                {"role": "system", "content": "You are a helpful AI assistant in a Telegram bot. "
-                                           "Be concise, friendly, and helpful in your responses."},
-                {"role": "system", "content": user_context},
-                {"role": "user", "content": user_input}
-            ]
-            
-            # Call the OpenAI API using new client
-            response = openai_client.chat.completions.create(
-                model=AI_MODEL,
+            # Call the OpenAI API without blocking the event loop
+            response = await openai_client.chat.completions.create(
+                model=CONFIG.ai_model,
                 messages=messages,
-                temperature=AI_TEMPERATURE,
-                max_tokens=MAX_TOKENS
+                temperature=CONFIG.ai_temperature,
+                max_tokens=CONFIG.max_tokens
             )
             
             # Extract and return the response
             return response.choices[0].message.content.strip()
             
-        elif AI_PROVIDER == "custom":
+        elif CONFIG.ai_provider == "custom":
             # Add your custom AI provider integration here
             return "🤖 Custom AI integration not yet implemented."
             
@@ -181,166 +457,212 @@ def get_ai_response(user_input: str, user_id: int) -> str:
             return "⚠️ Invalid AI provider configured."
             
     except Exception as e:
-        logger.error(f"Error in get_ai_response: {str(e)}")
+        logger.error("Error in get_ai_response: %s", e)
         return "⚠️ Sorry, I encountered an error processing your request. Please try again later."
 
+def get_system_messages(user_id: int) -> List[dict]:
+    """Get the cached system messages that give the AI context about a user."""
+    messages = _SYSTEM_MSG_CACHE.get(user_id)
+    if messages is None:
+        profile_data = get_user_data(user_id).get('profile', {})
+        user_context = (
+            f"You are chatting with {profile_data.get('full_name', 'a user')}. "
+            f"Their interests include: {', '.join(profile_data.get('interests', [])) or 'not specified'}. "
+            f"They are from {profile_data.get('location', 'an unknown location')}."
+        )
+        messages = [AI_SYSTEM_MESSAGE, {"role": "system", "content": user_context}]
+        _SYSTEM_MSG_CACHE[user_id] = messages
+    return messages
+
+def invalidate_system_messages(user_id: int) -> None:
+    """Drop cached system messages after a user's profile changed."""
+    _SYSTEM_MSG_CACHE.pop(user_id, None)
+
 def log_command(user_id: int, command: str) -> None:
     """Log command usage."""
+    global _CMD_COUNT
+    _CMD_COUNT += 1
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(COMMAND_LOGS, 'a', encoding='utf-8') as f:
-        f.write(f"{timestamp} - User {user_id} used command: {command}\n")
+    _CMD_LOG_FH.write(f"{timestamp} - User {user_id} used command: {command}\n")
 
 def save_chat_history(user_id: int, username: str, message: str, is_bot: bool = False) -> None:
     """Save chat history to file."""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     sender = "Bot" if is_bot else f"User {username} ({user_id})"
-    with open(CHAT_HISTORY_FILE, 'a', encoding='utf-8') as f:
-        f.write(f"[{timestamp}] {sender}: {message}\n")
+    _get_chat_log(timestamp[:10]).write(f"[{timestamp}] {sender}: {message}\n")
 
-def get_user_data(user_id: int) -> dict:
-    """Get user data from storage with default values."""
-    try:
-        with open(USERS_FILE, 'r', encoding='utf-8') as f:
-            users = json.load(f)
-        
-        user_id_str = str(user_id)
-        if user_id_str not in users:
-            users[user_id_str] = {
-                "chat_mode": False,
-                "first_seen": datetime.now().isoformat(),
-                "last_seen": datetime.now().isoformat(),
-                "message_count": 0,
-                "language": DEFAULT_LANGUAGE,
-                "role": UserRole.ADMIN.value if user_id in ADMIN_IDS 
-                         else UserRole.MODERATOR.value if user_id in MODERATOR_IDS 
-                         else UserRole.USER.value,
-                "profile": {
-                    "full_name": "",
-                    "username": "",
-                    "bio": "",
-                    "location": "",
-                    "interests": [],
-                    "preferred_topics": [],
-                    "last_activity": datetime.now().isoformat()
-                },
-                "settings": {
-                    "notifications": True,
-                    "daily_digest": False,
-                    "privacy": {
-                        "show_last_seen": True,
-                        "show_join_date": True,
-                        "show_activity_stats": True
-                    },
-                    "theme": "system"  # system/light/dark
-                },
-                "stats": {
-                    "commands_used": 0,
-                    "messages_sent": 0,
-                    "media_sent": 0,
-                    "stickers_sent": 0,
-                    "voice_messages": 0,
-                    "active_days": 1,
-                    "last_command": None,
-                    "last_command_time": None,
-                    "favorite_commands": {}
-                },
-                "rate_limit": {
-                    "count": 0,
-                    "last_reset": time.time()
-                },
-                "achievements": {
-                    "welcome": False,
-                    "early_adopter": False,
-                    "active_user": False,
-                    "feedback_provider": False,
-                    "power_user": False
-                },
-                "metadata": {
-                    "referral_code": "",
-                    "referred_by": "",
-                    "devices": [],
-                    "timezone": "UTC"
-                }
-            }
-            save_all_users(users)
-        
-        return users[user_id_str]
-    except Exception as e:
-        logger.error(f"Error reading user data: {e}")
-        return {
-            "chat_mode": False,
-            "first_seen": datetime.now().isoformat(),
-            "last_seen": datetime.now().isoformat(),
-            "message_count": 0,
-            "language": DEFAULT_LANGUAGE,
-            "role": UserRole.USER.value,
-            "settings": {"notifications": True, "daily_digest": False},
-            "stats": {"commands_used": 0, "messages_sent": 0, "last_command": None, "last_command_time": None},
-            "rate_limit": {"count": 0, "last_reset": time.time()}
-        }
+def _get_chat_log(day: str):
+    """Get the buffered chat history handle for a day, opening it on first use."""
+    fh = _CHAT_LOG_FHS.get(day)
+    if fh is None:
+        fh = open(os.path.join(CHAT_HISTORY_DIR, f"{day}.log"), 'a', buffering=LOG_BUFFER_SIZE, encoding='utf-8')
+        _CHAT_LOG_FHS[day] = fh
+    return fh
 
-def save_all_users(users_data: dict) -> None:
-    """Save all users data to storage."""
-    try:
-        with open(USERS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(users_data, f, indent=4, ensure_ascii=False, default=str)
-    except Exception as e:
-        logger.error(f"Error saving all users data: {e}")
+async def rotate_chat_logs(context: CallbackContext) -> None:
+    """Close chat history handles for past days."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    for day in [d for d in _CHAT_LOG_FHS if d != today]:
+        _CHAT_LOG_FHS.pop(day).close()
+
+def flush_logs() -> None:
+    """Flush buffered command and chat logs to disk."""
+    _CMD_LOG_FH.flush()
+    for fh in _CHAT_LOG_FHS.values():
+        fh.flush()
+
+async def _log_flusher() -> None:
+    """Background task that periodically flushes the buffered logs."""
+    while True:
+        await asyncio.sleep(LOG_FLUSH_INTERVAL)
+        flush_logs()
+
+def iso_now() -> str:
+    """Get the current time as an ISO string, reused for calls within the same second."""
+    global _ISO_NOW_SECOND, _ISO_NOW_VALUE
+    second = int(time.time())
+    if second != _ISO_NOW_SECOND:
+        _ISO_NOW_SECOND = second
+        _ISO_NOW_VALUE = datetime.fromtimestamp(second).isoformat()
+    return _ISO_NOW_VALUE
+
+def format_timestamp(timestamp: float, fmt: str = '%Y-%m-%d %H:%M') -> str:
+    """Format a stored epoch timestamp for display."""
+    return datetime.fromtimestamp(timestamp).strftime(fmt)
+
+def get_user_data(user_id: int) -> dict:
+    """Get user data from the in-memory cache, creating a default entry on first sight."""
+    user_id_str = str(user_id)
+    user_data = _USERS_CACHE.get(user_id_str)
+    if user_data is None:
+        user_data = copy.deepcopy(_DEFAULT_USER_TEMPLATE)
+        user_data['first_seen'] = user_data['last_seen'] = time.time()
+        user_data['profile']['last_activity'] = iso_now()
+        user_data['role'] = (UserRole.ADMIN.value if user_id in CONFIG.admin_ids 
+                             else UserRole.MODERATOR.value if user_id in CONFIG.moderator_ids 
+                             else UserRole.USER.value)
+        save_user_data(user_id, user_data)
+        _ROLE_COUNTS[user_data['role']] += 1
+        _DAILY_STATS.new_users += 1
+        _DAILY_STATS.active_users += 1
+    
+    return user_data
 
 def save_user_data(user_id: int, data: dict) -> None:
-    """Save user data to storage."""
-    try:
-        with open(USERS_FILE, 'r+', encoding='utf-8') as f:
-            users = json.load(f)
-            users[str(user_id)] = data
-            save_all_users(users)
-    except Exception as e:
-        logger.error(f"Error saving user data: {e}")
+    """Update user data in the cache and schedule a debounced write to storage."""
+    _USERS_CACHE[str(user_id)] = data
+    mark_user_dirty(user_id)
+
+def mark_user_dirty(user_id: int) -> None:
+    """Schedule a write for a cached user whose data was mutated in place."""
+    _DIRTY.add(str(user_id))
+    _flush_event.set()
 
 def get_all_users() -> dict:
     """Get all users data."""
+    return _USERS_CACHE
+
+def _take_dirty_rows() -> Tuple[Set[str], List[Tuple[int, bytes]]]:
+    """Serialize the users changed since the last flush and clear their dirty marks."""
+    dirty_ids = set(_DIRTY)
+    _DIRTY.clear()
+    return dirty_ids, _user_rows({user_id: _USERS_CACHE[user_id] for user_id in dirty_ids if user_id in _USERS_CACHE})
+
+def flush_users() -> None:
+    """Write the users changed since the last flush to the database, blocking (shutdown and exit)."""
+    if not _DIRTY:
+        return
+    dirty_ids, rows = _take_dirty_rows()
+    try:
+        _save_user_rows(rows)
+    except Exception as e:
+        # Keep them dirty so the next flush retries
+        _DIRTY.update(dirty_ids)
+        logger.error("Error saving users data: %s", e)
+
+async def flush_users_async() -> None:
+    """Write the users changed since the last flush to the database without blocking the event loop."""
+    if not _DIRTY:
+        return
+    dirty_ids, rows = _take_dirty_rows()
     try:
-        with open(USERS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        await asyncio.to_thread(_save_user_rows, rows)
+    except asyncio.CancelledError:
+        # Shutdown interrupted the write; the final blocking flush writes these users again
+        _DIRTY.update(dirty_ids)
+        raise
     except Exception as e:
-        logger.error(f"Error getting all users: {e}")
-        return {}
+        # Keep them dirty so the next flush retries
+        _DIRTY.update(dirty_ids)
+        logger.error("Error saving users data: %s", e)
+
+async def post_init(application: Application) -> None:
+    """Start background tasks once the application is initialized."""
+    application.bot_data['background_tasks'] = [
+        asyncio.create_task(_flusher()),
+        asyncio.create_task(_log_flusher()),
+    ]
+    await restore_reminders(application)
 
+async def post_shutdown(application: Application) -> None:
+    """Stop background tasks and write any pending changes to storage."""
+    for task in application.bot_data.get('background_tasks', []):
+        task.cancel()
+    flush_users()
+    flush_logs()
+
+async def _flusher() -> None:
+    """Background task that flushes the users cache once writes go idle."""
+    while True:
+        await _flush_event.wait()
+        # Debounce: keep waiting while new writes keep arriving
+        while _flush_event.is_set():
+            _flush_event.clear()
+            await asyncio.sleep(USERS_FLUSH_DELAY)
+        await flush_users_async()
+
+@lru_cache(maxsize=4096)
 def is_admin(user_id: int) -> bool:
     """Check if user is an admin."""
-    user_data = get_user_data(user_id)
-    return user_data.get('role') == UserRole.ADMIN.value or user_id in ADMIN_IDS
+    return (user_id in CONFIG.admin_ids or 
+            _USERS_CACHE.get(str(user_id), {}).get('role') == UserRole.ADMIN.value)
 
+@lru_cache(maxsize=4096)
 def is_moderator(user_id: int) -> bool:
     """Check if user is a moderator or admin."""
-    user_data = get_user_data(user_id)
-    return (user_data.get('role') in [UserRole.MODERATOR.value, UserRole.ADMIN.value] or 
-            user_id in MODERATOR_IDS or 
-            user_id in ADMIN_IDS)
+    return (user_id in CONFIG.moderator_ids or 
+            user_id in CONFIG.admin_ids or 
+            _USERS_CACHE.get(str(user_id), {}).get('role') in (UserRole.MODERATOR.value, UserRole.ADMIN.value))
+
+def invalidate_role_cache() -> None:
+    """Forget cached role checks after a user's role changed."""
+    is_admin.cache_clear()
+    is_moderator.cache_clear()
+
+def set_user_role(user_id: int, user_data: dict, role: str) -> None:
+    """Change a user's role, keeping role counts and role checks in sync."""
+    old_role = user_data.get('role', UserRole.USER.value)
+    _ROLE_COUNTS[old_role] -= 1
+    _ROLE_COUNTS[role] += 1
+    user_data['role'] = role
+    save_user_data(user_id, user_data)
+    invalidate_role_cache()
 
 def check_rate_limit(user_id: int) -> bool:
-    """Check if user has exceeded rate limit."""
-    user_data = get_user_data(user_id)
-    role = 'admin' if is_admin(user_id) else 'default'
-    limit = RATE_LIMIT[role]['limit']
-    per_seconds = RATE_LIMIT[role]['per_seconds']
-    
-    now = time.time()
-    rate_data = user_data.get('rate_limit', {'count': 0, 'last_reset': now})
+    """Check if user has exceeded rate limit using an in-memory token bucket."""
+    capacity = CONFIG.rate_limit_admin_limit if is_admin(user_id) else CONFIG.rate_limit_default_limit
+    rate = capacity / CONFIG.rate_limit_window
     
-    # Reset counter if time window has passed
-    if now - rate_data['last_reset'] > per_seconds:
-        rate_data['count'] = 0
-        rate_data['last_reset'] = now
+    now = time.monotonic()
+    tokens, last_refill = _BUCKETS.get(user_id, (capacity, now))
     
-    # Check rate limit
-    if rate_data['count'] >= limit:
+    # Refill tokens for the time elapsed since the last request
+    tokens = min(capacity, tokens + (now - last_refill) * rate)
+    if tokens < 1:
+        _BUCKETS[user_id] = (tokens, now)
         return False
     
-    # Increment counter
-    rate_data['count'] += 1
-    user_data['rate_limit'] = rate_data
-    save_user_data(user_id, user_data)
+    _BUCKETS[user_id] = (tokens - 1, now)
     return True
 
 # Command handlers
@@ -350,7 +672,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_data = get_user_data(user.id)
     
     if not user_data.get('first_seen'):
-        user_data['first_seen'] = datetime.now().isoformat()
+        user_data['first_seen'] = time.time()
         save_user_data(user.id, user_data)
     
     welcome_text = (
@@ -374,42 +696,38 @@ async def profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         user_data['profile'].update({
             'full_name': f"{user.first_name} {user.last_name or ''}".strip(),
             'username': user.username or "",
-            'last_activity': datetime.now().isoformat()
+            'last_activity': iso_now()
         })
         save_user_data(user.id, user_data)
+        invalidate_system_messages(user.id)
     
     # Format profile information
+    profile_data = user_data['profile']
+    username = html.escape(profile_data['username'])
     profile_text = (
-        f"👤 *{user_data['profile']['full_name']}*"
-        f"{f' (@{user_data['profile']['username']})' if user_data['profile']['username'] else ''}\n\n"
-        f"🆔 User ID: `{user.id}`\n"
-        f"📅 Member since: {datetime.fromisoformat(user_data['first_seen']).strftime('%Y-%m-%d %H:%M')}\n"
+        f"👤 <b>{html.escape(profile_data['full_name'])}</b>"
+        f"{f' (@{username})' if username else ''}\n\n"
+        f"🆔 User ID: <code>{user.id}</code>\n"
+        f"📅 Member since: {format_timestamp(user_data['first_seen'])}\n"
         f"🌐 Language: {user_data['language'].upper()}\n"
-        f"📝 Bio: {user_data['profile']['bio'] or 'Not set'}\n"
-        f"📍 Location: {user_data['profile']['location'] or 'Not set'}\n"
-        f"🎯 Interests: {', '.join(user_data['profile']['interests']) or 'None'}\n"
+        f"📝 Bio: {html.escape(profile_data['bio'] or 'Not set')}\n"
+        f"📍 Location: {html.escape(profile_data['location'] or 'Not set')}\n"
+        f"🎯 Interests: {html.escape(', '.join(profile_data['interests']) or 'None')}\n"
         f"📊 Messages sent: {user_data['stats']['messages_sent']}\n"
-        f"📱 Last seen: {datetime.fromisoformat(user_data['last_seen']).strftime('%Y-%m-%d %H:%M')}"
+        f"📱 Last seen: {format_timestamp(user_data['last_seen'])}"
     )
     
-    # Create inline keyboard for profile actions
-    keyboard = [
-        [InlineKeyboardButton("✏️ Edit Profile", callback_data="edit_profile")],
-        [InlineKeyboardButton("🔙 Back to Menu", callback_data="back_to_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
     if update.callback_query:
         await update.callback_query.edit_message_text(
             profile_text,
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
+            reply_markup=_PROFILE_KEYBOARD,
+            parse_mode='HTML'
         )
     else:
         await update.message.reply_text(
             profile_text,
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
+            reply_markup=_PROFILE_KEYBOARD,
+            parse_mode='HTML'
         )
     
     return PROFILE
@@ -419,17 +737,9 @@ async def edit_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
     query = update.callback_query
     await query.answer()
     
-    keyboard = [
-        [InlineKeyboardButton("📝 Bio", callback_data="edit_bio")],
-        [InlineKeyboardButton("📍 Location", callback_data="edit_location")],
-        [InlineKeyboardButton("🎯 Interests", callback_data="edit_interests")],
-        [InlineKeyboardButton("🔙 Back to Profile", callback_data="back_to_profile")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
     await query.edit_message_text(
         "What would you like to edit?",
-        reply_markup=reply_markup
+        reply_markup=_EDIT_PROFILE_KEYBOARD
     )
     
     return EDIT_CHOICE
@@ -487,10 +797,11 @@ async def save_profile_edit(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text(f"🎯 Updated {len(interests)} interests!")
     
     # Update last activity
-    user_data['profile']['last_activity'] = datetime.now().isoformat()
+    user_data['profile']['last_activity'] = iso_now()
     
     # Save the updated profile
     save_user_data(user.id, user_data)
+    invalidate_system_messages(user.id)
     
     # Show the updated profile
     await profile(update, context)
@@ -507,42 +818,22 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     user_data = get_user_data(user.id)
     lang = user_data.get('language', DEFAULT_LANGUAGE)
     
+    if lang not in LANGUAGES:
+        lang = DEFAULT_LANGUAGE
+    
     # Base commands available to all users
-    help_text = f"{LANGUAGES.get(lang, LANGUAGES[DEFAULT_LANGUAGE])['help']}\n\n"
-    help_text += "• /start - Show welcome message\n"
-    help_text += "• /help - Show this help message\n"
-    help_text += "• /profile - View and edit your profile\n"
-    help_text += "• /chat - Start AI chat mode\n"
-    help_text += "• /contact - Contact information\n"
-    help_text += "• /feedback - Send us your feedback\n"
-    help_text += "• /language - Change language\n"
-    help_text += "• /remindme - Set a reminder\n"
-    help_text += "• /myinfo - Show your information\n"
+    help_text = _HELP_USER[lang]
     
     # Add moderator commands if user is moderator
     if is_moderator(user.id):
-        help_text += f"\n{LANGUAGES.get(lang, LANGUAGES[DEFAULT_LANGUAGE])['moderator_commands']}\n"
-        help_text += "• /broadcast - Send message to all users\n"
-        help_text += "• /userinfo - Get user information\n"
+        help_text += _HELP_MODERATOR[lang]
     
     # Add admin commands if user is admin
     if is_admin(user.id):
-        help_text += f"\n{LANGUAGES.get(lang, LANGUAGES[DEFAULT_LANGUAGE])['admin_commands']}\n"
-        help_text += "• /stats - Show bot statistics\n"
-        help_text += "• /export - Export user data\n"
-        help_text += "• /announce - Make an announcement\n"
-    
-    # Create keyboard with quick actions
-    keyboard = [
-        [InlineKeyboardButton("💬 Start Chat", callback_data="start_chat"),
-         InlineKeyboardButton("📝 Feedback", callback_data="give_feedback")],
-        [InlineKeyboardButton("⚙️ Settings", callback_data="settings")]
-    ]
+        help_text += _HELP_ADMIN[lang]
     
-    if is_moderator(user.id):
-        keyboard.append([InlineKeyboardButton("👥 User Management", callback_data="user_management")])
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    # Quick actions keyboard, with user management for moderators
+    reply_markup = _HELP_KEYBOARD_MODERATOR if is_moderator(user.id) else _HELP_KEYBOARD_USER
     
     await update.message.reply_text(
         help_text,
@@ -567,10 +858,15 @@ async def chat_mode(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Enable AI chat mode for the user."""
     user = update.effective_user
     user_data = get_user_data(user.id)
-    user_data['chat_mode'] = True
-    save_user_data(user.id, user_data)
+    if not user_data.get('chat_mode'):
+        user_data['chat_mode'] = True
+        save_user_data(user.id, user_data)
     
-    await update.message.reply_text(
+    # Also reachable from the "Start Chat" button
+    if update.callback_query:
+        await update.callback_query.answer()
+    
+    await update.effective_message.reply_text(
         "💬 *AI Chat Mode Activated*\n\n"
         "You're now chatting with the AI! Send any message and I'll respond.\n"
         "Type /endchat to exit chat mode.",
@@ -582,8 +878,9 @@ async def end_chat(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Disable AI chat mode for the user."""
     user = update.effective_user
     user_data = get_user_data(user.id)
-    user_data['chat_mode'] = False
-    save_user_data(user.id, user_data)
+    if user_data.get('chat_mode'):
+        user_data['chat_mode'] = False
+        save_user_data(user.id, user_data)
     
     await update.message.reply_text(
         "👋 *AI Chat Mode Deactivated*\n\n"
@@ -596,7 +893,7 @@ async def end_chat(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 async def owner(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Hidden command to show bot owner information."""
     user = update.effective_user
-    if user.id in ADMIN_IDS:
+    if user.id in CONFIG.admin_ids:
         await update.message.reply_text(
             "👑 *Bot Owner Commands*\n\n"
             "• /status - Show bot status\n"
@@ -610,15 +907,11 @@ async def owner(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 async def status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show bot status (admin only)."""
     user = update.effective_user
-    if user.id in ADMIN_IDS:
+    if user.id in CONFIG.admin_ids:
         try:
-            with open(USERS_FILE, 'r', encoding='utf-8') as f:
-                users = json.load(f)
-            total_users = len(users)
+            total_users = len(get_all_users())
+            total_commands = _CMD_COUNT
             
-            with open(COMMAND_LOGS, 'r', encoding='utf-8') as f:
-                total_commands = len(f.readlines())
-                
             status_text = (
                 "📊 *Bot Status*\n\n"
                 f"• Total Users: {total_users}\n"
@@ -647,6 +940,32 @@ def get_uptime() -> str:
 
 # Message handler for AI chat mode
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Queue an incoming message for its chat's worker and return immediately.
+    
+    Messages within one chat are processed in order, while different chats
+    are processed concurrently so a slow AI reply doesn't hold up others.
+    """
+    chat_id = update.effective_chat.id
+    queue = _CHAT_QUEUES.get(chat_id)
+    if queue is None:
+        queue = _CHAT_QUEUES[chat_id] = asyncio.Queue()
+        context.application.create_task(_chat_worker(chat_id, queue), update=update)
+    queue.put_nowait((update, context))
+
+async def _chat_worker(chat_id: int, queue: asyncio.Queue) -> None:
+    """Process queued messages for one chat sequentially until the queue is drained."""
+    try:
+        while not queue.empty():
+            update, context = queue.get_nowait()
+            try:
+                await process_message(update, context)
+            except Exception as e:
+                await context.application.process_error(update, e)
+    finally:
+        _CHAT_QUEUES.pop(chat_id, None)
+
+async def process_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle incoming messages and process them based on context.
     
@@ -663,10 +982,14 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     
     # Update user's last seen and message count
     user_data = get_user_data(user.id)
-    user_data['last_seen'] = datetime.now().isoformat()
+    now = time.time()
+    if day_number(user_data.get('last_seen') or 0) != day_number(now):
+        _DAILY_STATS.active_users += 1
+    _DAILY_STATS.messages += 1
+    user_data['last_seen'] = now
     user_data['stats'] = user_data.get('stats', {})
     user_data['stats']['messages_sent'] = user_data['stats'].get('messages_sent', 0) + 1
-    save_user_data(user.id, user_data)
+    mark_user_dirty(user.id)
     
     # Check rate limiting
     if not check_rate_limit(user.id):
@@ -688,7 +1011,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         
         try:
             # Get AI response
-            ai_response = get_ai_response(message_text, user.id)
+            ai_response = await get_ai_response(message_text, user.id)
             
             # Send the response with markdown parsing
             await update.message.reply_text(ai_response, parse_mode='Markdown')
@@ -697,7 +1020,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             save_chat_history(user.id, "Bot", ai_response, is_bot=True)
             
         except Exception as e:
-            logger.error(f"Error in AI chat: {str(e)}")
+            logger.error("Error in AI chat: %s", e)
             await update.message.reply_text(
                 "⚠️ Sorry, I encountered an error processing your message. "
                 "Please try again later or contact support if the issue persists."
@@ -749,7 +1072,7 @@ async def error_handler(update: object, context: CallbackContext) -> None:
                 "The developers have been notified."
             )
         except Exception as e:
-            logger.error(f"Failed to send error message: {e}")
+            logger.error("Failed to send error message: %s", e)
 
 # New command handlers
 async def feedback_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -759,7 +1082,11 @@ async def feedback_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     user_data['waiting_for_feedback'] = True
     save_user_data(user.id, user_data)
     
-    await update.message.reply_text(
+    # Also reachable from the "Feedback" button
+    if update.callback_query:
+        await update.callback_query.answer()
+    
+    await update.effective_message.reply_text(
         "💬 Please share your feedback. What would you like to tell us?"
     )
     log_command(user.id, "/feedback")
@@ -774,18 +1101,10 @@ async def handle_feedback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         'user_id': user.id,
         'username': user.username or f"{user.first_name} {user.last_name or ''}".strip(),
         'text': feedback_text,
-        'timestamp': datetime.now().isoformat()
+        'timestamp': iso_now()
     }
     
-    try:
-        with open(FEEDBACK_FILE, 'r+', encoding='utf-8') as f:
-            feedbacks = json.load(f)
-            feedbacks[str(datetime.now().timestamp())] = feedback
-            f.seek(0)
-            json.dump(feedbacks, f, indent=4, ensure_ascii=False)
-            f.truncate()
-    except Exception as e:
-        logger.error(f"Error saving feedback: {e}")
+    await save_feedback(feedback)
     
     # Reset feedback flag
     user_data = get_user_data(user.id)
@@ -793,20 +1112,27 @@ async def handle_feedback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     save_user_data(user.id, user_data)
     
     # Notify admins
-    admin_message = (
-        f"📝 *New Feedback*\n\n"
-        f"From: {user.mention_markdown_v2()}"
-        f" ({user.id if user.id != user.username else ''})\n"
-        f"Text: {feedback_text}"
-    )
+    admin_message = "".join([
+        "📝 *New Feedback*\n\nFrom: ",
+        user.mention_markdown_v2(),
+        f" \\({user.id}\\)\nText: ",
+        escape_markdown(feedback_text, version=2),
+    ])
     
-    await notify_admins(context, admin_message)
+    await notify_admins(context, admin_message, parse_mode='MarkdownV2')
     
     # Thank user
     await update.message.reply_text(
         "🙏 Thank you for your feedback! We appreciate your input."
     )
 
+async def save_feedback(feedback: dict) -> None:
+    """Save feedback to file without blocking the event loop."""
+    try:
+        await asyncio.to_thread(_append_record, FEEDBACK_FILE, feedback)
+    except Exception as e:
+        logger.error("Error saving feedback: %s", e)
+
 async def set_language(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle language selection."""
     query = update.callback_query
@@ -817,8 +1143,9 @@ async def set_language(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     
     if lang in LANGUAGES:
         user_data = get_user_data(user.id)
-        user_data['language'] = lang
-        save_user_data(user.id, user_data)
+        if user_data['language'] != lang:
+            user_data['language'] = lang
+            save_user_data(user.id, user_data)
         
         await query.edit_message_text(
             f"✅ Language set to {lang.upper()}"
@@ -828,55 +1155,30 @@ async def set_language(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             "❌ Invalid language selection."
         )
 
+async def answer_unhandled_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Answer button presses no other handler matched so the client stops its loading spinner."""
+    await update.callback_query.answer()
+
 async def remind_me(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /remindme command."""
     user = update.effective_user
     user_data = get_user_data(user.id)
     
     if context.args:
-        try:
-            # Parse time and message from command
-            time_str = context.args[0]
-            message = ' '.join(context.args[1:]) if len(context.args) > 1 else "Reminder!"
-            
-            # Parse time (e.g., "in 5 minutes" or "tomorrow at 14:30")
-            reminder_time = parse_time(time_str)
-            
-            if reminder_time > datetime.now():
-                # Schedule reminder
-                job_context = {
-                    'chat_id': update.effective_chat.id,
-                    'message': message,
-                    'user_id': user.id
-                }
-                
-                # Calculate delay in seconds
-                delay = (reminder_time - datetime.now()).total_seconds()
-                
-                # Schedule the job
-                context.job_queue.run_once(
-                    send_reminder,
-                    delay,
-                    data=job_context,
-                    name=f"reminder_{user.id}_{int(time.time())}"
-                )
-                
-                await update.message.reply_text(
-                    f"⏰ I'll remind you at {reminder_time.strftime('%Y-%m-%d %H:%M')}:\n{message}"
-                )
-                
-                # Save reminder
-                save_reminder(user.id, reminder_time, message)
-                
-            else:
-                await update.message.reply_text(
-                    "Please specify a future time for the reminder."
-                )
-                
-        except (ValueError, IndexError):
+        # Parse time and message from command: "in 5 minutes ..." or "at 14:30 ..."
+        first = context.args[0].lower()
+        time_words = 3 if first == 'in' else 2 if first == 'at' else 1
+        time_str = ' '.join(context.args[:time_words])
+        message = ' '.join(context.args[time_words:]) or "Reminder!"
+        
+        reminder_time = await _schedule_reminder(context, update.effective_chat.id, user.id, time_str, message)
+        if reminder_time:
             await update.message.reply_text(
-                "Invalid format. Use: /remindme [time] [message]\n"
-                "Example: /remindme in 30 minutes Call mom"
+                f"⏰ I'll remind you at {reminder_time.strftime('%Y-%m-%d %H:%M')}:\n{message}"
+            )
+        else:
+            await update.message.reply_text(
+                "Please specify a valid future time for the reminder."
             )
     else:
         # Show reminder setup help
@@ -890,74 +1192,115 @@ async def remind_me(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             parse_mode='Markdown'
         )
 
+async def _schedule_reminder(context: CallbackContext, chat_id: int, user_id: int,
+                             time_str: str, message: str) -> Optional[datetime]:
+    """
+    Save a reminder and schedule its delivery.
+    
+    Returns:
+        Optional[datetime]: The reminder time, or None if it is invalid or not in the future
+    """
+    now = datetime.now()
+    try:
+        reminder_time = parse_time(time_str, now)
+    except (OverflowError, ValueError):
+        # Amounts too large for datetime, like "in 99999999999 weeks"
+        return None
+    if reminder_time <= now:
+        return None
+    
+    # Save reminder so it survives restarts
+    reminder_id = await save_reminder(user_id, chat_id, reminder_time, message)
+    
+    context.job_queue.run_once(
+        send_reminder,
+        (reminder_time - now).total_seconds(),
+        data={'chat_id': chat_id, 'message': message, 'user_id': user_id, 'reminder_id': reminder_id},
+        # Named after the database row like restored reminders; unsaved ones keep PTB's default name
+        name=f"reminder_{user_id}_{reminder_id}" if reminder_id is not None else None,
+        job_kwargs={'misfire_grace_time': None}
+    )
+    return reminder_time
+
 async def send_reminder(context: CallbackContext) -> None:
-    """Send reminder to user."""
+    """Send reminder to user and remove it from the database."""
     job = context.job
-    await context.bot.send_message(
-        job.data['chat_id'],
-        f"🔔 *Reminder*: {job.data['message']}",
-        parse_mode='Markdown'
-    )
+    try:
+        await context.bot.send_message(
+            job.data['chat_id'],
+            f"🔔 *Reminder*: {job.data['message']}",
+            parse_mode='Markdown'
+        )
+    finally:
+        if job.data.get('reminder_id') is not None:
+            await asyncio.to_thread(_delete_reminder, job.data['reminder_id'])
 
-def save_reminder(user_id: int, reminder_time: datetime, message: str) -> None:
-    """Save reminder to file."""
+async def save_reminder(user_id: int, chat_id: int, reminder_time: datetime, message: str) -> Optional[int]:
+    """Save reminder to the database without blocking the event loop."""
     try:
-        with open(REMINDERS_FILE, 'r+', encoding='utf-8') as f:
-            reminders = json.load(f)
-            
-            reminder = {
-                'user_id': user_id,
-                'time': reminder_time.isoformat(),
-                'message': message,
-                'created_at': datetime.now().isoformat()
-            }
-            
-            reminders.append(reminder)
-            f.seek(0)
-            json.dump(reminders, f, indent=4, ensure_ascii=False, default=str)
-            f.truncate()
+        return await asyncio.to_thread(_insert_reminder, user_id, chat_id, reminder_time.timestamp(), message)
     except Exception as e:
-        logger.error(f"Error saving reminder: {e}")
+        logger.error("Error saving reminder: %s", e)
+        return None
+
+def _insert_reminder(user_id: int, chat_id: int, due: float, message: str) -> int:
+    """Insert a reminder row and return its ID."""
+    with closing(sqlite3.connect(DB_FILE)) as conn, conn:
+        cursor = conn.execute(
+            "INSERT INTO reminders (user_id, chat_id, due, message, created_at) VALUES (?, ?, ?, ?, ?)",
+            (user_id, chat_id, due, message, time.time())
+        )
+        return cursor.lastrowid
+
+def _delete_reminder(reminder_id: int) -> None:
+    """Delete a reminder row once it has been delivered."""
+    with closing(sqlite3.connect(DB_FILE)) as conn, conn:
+        conn.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
+
+def _load_reminders() -> List[tuple]:
+    """Get all pending reminders ordered by due time."""
+    with closing(sqlite3.connect(DB_FILE)) as conn:
+        return conn.execute(
+            "SELECT id, user_id, chat_id, due, message FROM reminders ORDER BY due"
+        ).fetchall()
+
+async def restore_reminders(application: Application) -> None:
+    """Reschedule reminders saved before the last restart."""
+    now = time.time()
+    for reminder_id, user_id, chat_id, due, message in await asyncio.to_thread(_load_reminders):
+        # Reminders that came due while the bot was down are sent as soon as the job queue
+        # starts; with no misfire grace limit APScheduler never drops them as missed
+        application.job_queue.run_once(
+            send_reminder,
+            max(0, due - now),
+            data={'chat_id': chat_id, 'message': message, 'user_id': user_id, 'reminder_id': reminder_id},
+            name=f"reminder_{user_id}_{reminder_id}",
+            job_kwargs={'misfire_grace_time': None}
+        )
+
+# Reminder time formats: "in 5 minutes" and "at 14:30"
+_IN_RE = re.compile(r'^in\s+(\d+)\s+(minute|hour|day|week)s?$', re.IGNORECASE)
+_AT_RE = re.compile(r'^at\s+([01]?\d|2[0-3]):([0-5]\d)$', re.IGNORECASE)
 
-def parse_time(time_str: str) -> datetime:
-    """Parse natural language time string to datetime."""
+def parse_time(time_str: str, now: Optional[datetime] = None) -> datetime:
+    """Parse natural language time string to datetime, relative to now."""
     # This is a simplified version - you might want to use a library like dateparser for production
-    now = datetime.now()
+    now = now or datetime.now()
+    time_str = time_str.strip()
     
-    # Handle "in X minutes/hours/days"
-    if time_str.startswith('in '):
-        parts = time_str[3:].split()
-        if len(parts) >= 2:
-            try:
-                amount = int(parts[0])
-                unit = parts[1].lower()
-                
-                if 'minute' in unit:
-                    return now + timedelta(minutes=amount)
-                elif 'hour' in unit:
-                    return now + timedelta(hours=amount)
-                elif 'day' in unit:
-                    return now + timedelta(days=amount)
-                elif 'week' in unit:
-                    return now + timedelta(weeks=amount)
-            except (ValueError, IndexError):
-                pass
+    # Handle "in X minutes/hours/days/weeks"
+    if m := _IN_RE.match(time_str):
+        return now + timedelta(**{m.group(2).lower() + 's': int(m.group(1))})
     
     # Handle specific times like "at 14:30"
-    elif time_str.startswith('at '):
-        time_part = time_str[3:].strip()
-        try:
-            # Try to parse time in format HH:MM
-            hours, minutes = map(int, time_part.split(':'))
-            reminder_time = now.replace(hour=hours, minute=minutes, second=0, microsecond=0)
+    if m := _AT_RE.match(time_str):
+        reminder_time = now.replace(hour=int(m.group(1)), minute=int(m.group(2)), second=0, microsecond=0)
+        
+        # If the time has already passed today, set it for tomorrow
+        if reminder_time < now:
+            reminder_time += timedelta(days=1)
             
-            # If the time has already passed today, set it for tomorrow
-            if reminder_time < now:
-                reminder_time += timedelta(days=1)
-                
-            return reminder_time
-        except (ValueError, IndexError):
-            pass
+        return reminder_time
     
     # Default: add 1 hour
     return now + timedelta(hours=1)
@@ -982,26 +1325,12 @@ async def broadcast_message(update: Update, context: ContextTypes.DEFAULT_TYPE)
     message = ' '.join(context.args)
     users = get_all_users()
     total = len(users)
-    success = 0
-    failed = 0
     
     # Send broadcast to all users
-    for user_id_str in users:
-        try:
-            await context.bot.send_message(
-                chat_id=user_id_str,
-                text=f"📢 *Announcement*\n\n{message}",
-                parse_mode='Markdown'
-            )
-            success += 1
-            # Small delay to avoid hitting rate limits
-            await asyncio.sleep(0.1)
-        except Exception as e:
-            logger.error(f"Failed to send broadcast to {user_id_str}: {e}")
-            failed += 1
+    success, failed = await send_to_many(context.bot, list(users), f"📢 *Announcement*\n\n{message}")
     
     # Save broadcast record
-    save_broadcast(user.id, message, total, success, failed)
+    await save_broadcast(user.id, message, total, success, failed)
     
     # Send report to admin
     await update.message.reply_text(
@@ -1013,67 +1342,72 @@ async def broadcast_message(update: Update, context: ContextTypes.DEFAULT_TYPE)
         parse_mode='Markdown'
     )
 
-def save_broadcast(admin_id: int, message: str, total: int, success: int, failed: int) -> None:
-    """Save broadcast record to file."""
+async def save_broadcast(admin_id: int, message: str, total: int, success: int, failed: int) -> None:
+    """Save broadcast record to file without blocking the event loop."""
     try:
-        with open(BROADCASTS_FILE, 'r+', encoding='utf-8') as f:
-            try:
-                broadcasts = json.load(f)
-            except json.JSONDecodeError:
-                broadcasts = []
-            
-            broadcast = {
-                'admin_id': admin_id,
-                'timestamp': datetime.now().isoformat(),
-                'message': message,
-                'total_recipients': total,
-                'successful': success,
-                'failed': failed
-            }
-            
-            broadcasts.append(broadcast)
-            f.seek(0)
-            json.dump(broadcasts, f, indent=4, ensure_ascii=False, default=str)
-            f.truncate()
+        broadcast = {
+            'admin_id': admin_id,
+            'timestamp': iso_now(),
+            'message': message,
+            'total_recipients': total,
+            'successful': success,
+            'failed': failed
+        }
+        
+        await asyncio.to_thread(_append_record, BROADCASTS_FILE, broadcast)
     except Exception as e:
-        logger.error(f"Error saving broadcast: {e}")
+        logger.error("Error saving broadcast: %s", e)
 
-async def notify_admins(context: CallbackContext, message: str) -> None:
+async def notify_admins(context: CallbackContext, message: str, parse_mode: str = 'Markdown') -> None:
     """Send a message to all admins."""
-    for admin_id in ADMIN_IDS:
-        try:
-            await context.bot.send_message(
-                chat_id=admin_id,
-                text=message,
-                parse_mode='Markdown'
-            )
-        except Exception as e:
-            logger.error(f"Failed to notify admin {admin_id}: {e}")
+    await send_to_many(context.bot, list(CONFIG.admin_ids), message, parse_mode)
 
-# Button callbacks
-async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle button callbacks."""
-    query = update.callback_query
-    await query.answer()
+async def send_to_many(bot, chat_ids: List, text: str, parse_mode: str = 'Markdown') -> Tuple[int, int]:
+    """
+    Send the same message to many chats concurrently.
     
-    if query.data == "start_chat":
-        await chat_mode(update, context)
-    elif query.data == "give_feedback":
-        await feedback_command(update, context)
-    elif query.data.startswith("set_lang_"):
-        await set_language(update, context)
-    # Add more button handlers as needed
+    Sends start at most SEND_RATE_LIMIT per second with at most that many in
+    flight, keeping below Telegram's global limit of 30 messages per second.
+    
+    Returns:
+        Tuple[int, int]: Number of successful and failed sends
+    """
+    semaphore = asyncio.Semaphore(SEND_RATE_LIMIT)
+    
+    async def send_one(index: int, chat_id) -> bool:
+        await asyncio.sleep(index / SEND_RATE_LIMIT)
+        async with semaphore:
+            try:
+                await bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+                return True
+            except Exception as e:
+                logger.error("Failed to send message to %s: %s", chat_id, e)
+                return False
+    
+    results = await asyncio.gather(*(send_one(i, chat_id) for i, chat_id in enumerate(chat_ids)))
+    success = sum(results)
+    return success, len(results) - success
 
 # Add this to main()
 def main() -> None:
     """Start the bot."""
-    if not TOKEN:
+    if not CONFIG.token:
         print("ERROR: Please set TELEGRAM_BOT_TOKEN in your .env file")
         print("Copy .env.example to .env and fill in your credentials")
         return
     
-    # Create the Application with persistence
-    application = Application.builder().token(TOKEN).build()
+    # Create the Application with background flushing of cached data
+    application = (
+        Application.builder()
+        .token(CONFIG.token)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
+    
+    # Make sure cached user data and logs reach disk even on abrupt exits
+    atexit.register(flush_users)
+    atexit.register(flush_logs)
     
     # Add conversation handler for profile management
     profile_conv_handler = ConversationHandler(
@@ -1116,7 +1450,11 @@ def main() -> None:
     application.add_handler(CommandHandler("demote", demote_user))
     
     # Update callback query handler to exclude profile patterns
-    application.add_handler(CallbackQueryHandler(button_callback, pattern="^(?!edit_|back_to_)"))
+    application.add_handler(CallbackQueryHandler(chat_mode, pattern="^start_chat$"))
+    application.add_handler(CallbackQueryHandler(feedback_command, pattern="^give_feedback$"))
+    application.add_handler(CallbackQueryHandler(set_language, pattern="^set_lang_"))
+    # Buttons without a handler yet (e.g. settings, user_management) still get answered
+    application.add_handler(CallbackQueryHandler(answer_unhandled_query))
     
     # Add message handler (must be after command handlers)
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
@@ -1131,35 +1469,41 @@ def main() -> None:
     job_queue = application.job_queue
     
     # Add daily stats job
-    job_queue.run_daily(send_daily_stats, time=datetime.time(hour=0, minute=0))
+    job_queue.run_daily(send_daily_stats, time=dt_time(hour=0, minute=0))
+    
+    # Close the previous day's chat history file shortly after local midnight; day files are
+    # named by local date, while run_daily defaults to UTC (offset taken at startup)
+    local_tz = datetime.now().astimezone().tzinfo
+    job_queue.run_daily(rotate_chat_logs, time=dt_time(hour=0, minute=1, tzinfo=local_tz))
     
     # Start the bot
     application.run_polling()
 
 # Daily stats function
 # Missing function implementations
-async def language_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /language command - show language selection."""
-    user = update.effective_user
-    user_data = get_user_data(user.id)
-    current_lang = user_data.get('language', DEFAULT_LANGUAGE)
-    
-    # Create language selection keyboard
+@lru_cache(maxsize=None)
+def _language_keyboard(current_lang: str) -> InlineKeyboardMarkup:
+    """Build the language selection keyboard, marking the current language."""
     keyboard = []
     for lang_code, lang_data in LANGUAGES.items():
-        flag = "🇺🇸" if lang_code == 'en' else "🇪🇸" if lang_code == 'es' else "🌐"
         status = "✅" if lang_code == current_lang else ""
         keyboard.append([InlineKeyboardButton(
-            f"{flag} {lang_code.upper()} {status}",
+            f"{lang_data.get('flag', '🌐')} {lang_code.upper()} {status}",
             callback_data=f"set_lang_{lang_code}"
         )])
     
     keyboard.append([InlineKeyboardButton("🔙 Back", callback_data="back_to_menu")])
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    return InlineKeyboardMarkup(keyboard)
+
+async def language_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /language command - show language selection."""
+    user = update.effective_user
+    user_data = get_user_data(user.id)
+    current_lang = user_data.get('language', DEFAULT_LANGUAGE)
     
     await update.message.reply_text(
         "🌐 *Select Language*\n\nChoose your preferred language:",
-        reply_markup=reply_markup,
+        reply_markup=_language_keyboard(current_lang),
         parse_mode='Markdown'
     )
     log_command(user.id, "/language")
@@ -1174,25 +1518,27 @@ async def my_info(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         user_data['profile'].update({
             'full_name': f"{user.first_name} {user.last_name or ''}".strip(),
             'username': user.username or "",
-            'last_activity': datetime.now().isoformat()
+            'last_activity': iso_now()
         })
         save_user_data(user.id, user_data)
+        invalidate_system_messages(user.id)
     
+    profile_data = user_data['profile']
     info_text = (
-        f"👤 *Your Information*\n\n"
-        f"🆔 User ID: `{user.id}`\n"
-        f"👤 Full Name: {user_data['profile']['full_name']}\n"
-        f"🔖 Username: @{user_data['profile']['username'] if user_data['profile']['username'] else 'Not set'}\n"
-        f"📅 Member since: {datetime.fromisoformat(user_data['first_seen']).strftime('%Y-%m-%d %H:%M')}\n"
+        f"👤 <b>Your Information</b>\n\n"
+        f"🆔 User ID: <code>{user.id}</code>\n"
+        f"👤 Full Name: {html.escape(profile_data['full_name'])}\n"
+        f"🔖 Username: @{html.escape(profile_data['username'] or 'Not set')}\n"
+        f"📅 Member since: {format_timestamp(user_data['first_seen'])}\n"
         f"🌐 Language: {user_data['language'].upper()}\n"
         f"📊 Messages sent: {user_data['stats']['messages_sent']}\n"
-        f"📱 Last seen: {datetime.fromisoformat(user_data['last_seen']).strftime('%Y-%m-%d %H:%M')}\n"
-        f"📝 Bio: {user_data['profile']['bio'] or 'Not set'}\n"
-        f"📍 Location: {user_data['profile']['location'] or 'Not set'}\n"
-        f"🎯 Interests: {', '.join(user_data['profile']['interests']) or 'None'}"
+        f"📱 Last seen: {format_timestamp(user_data['last_seen'])}\n"
+        f"📝 Bio: {html.escape(profile_data['bio'] or 'Not set')}\n"
+        f"📍 Location: {html.escape(profile_data['location'] or 'Not set')}\n"
+        f"🎯 Interests: {html.escape(', '.join(profile_data['interests']) or 'None')}"
     )
     
-    await update.message.reply_text(info_text, parse_mode='Markdown')
+    await update.message.reply_text(info_text, parse_mode='HTML')
     log_command(user.id, "/myinfo")
 
 async def list_users(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -1211,8 +1557,8 @@ async def list_users(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
         return
     
     # Group users by role
-    admin_count = sum(1 for u in users.values() if u.get('role') == UserRole.ADMIN.value)
-    mod_count = sum(1 for u in users.values() if u.get('role') == UserRole.MODERATOR.value)
+    admin_count = _ROLE_COUNTS[UserRole.ADMIN.value]
+    mod_count = _ROLE_COUNTS[UserRole.MODERATOR.value]
     user_count = total_users - admin_count - mod_count
     
     users_text = f"👥 *User Statistics*\n\n"
@@ -1223,10 +1569,10 @@ async def list_users(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
     
     # Show recent users (last 10)
     users_text += "🕐 *Recent Users:*\n"
-    recent_users = sorted(users.items(), key=lambda x: x[1].get('first_seen', ''), reverse=True)[:10]
+    recent_users = heapq.nlargest(10, users.items(), key=lambda x: x[1].get('first_seen') or 0)
     
     for user_id, user_data in recent_users:
-        first_seen = datetime.fromisoformat(user_data.get('first_seen', '2000-01-01')).strftime('%Y-%m-%d')
+        first_seen = format_timestamp(user_data.get('first_seen') or 0, '%Y-%m-%d')
         role = user_data.get('role', 'user')
         username = user_data.get('profile', {}).get('username', 'N/A')
         users_text += f"• {first_seen} - {username} (ID: {user_id}) - {role}\n"
@@ -1266,8 +1612,8 @@ async def promote_user(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             return
         
         old_role = target_user_data.get('role', UserRole.USER.value)
-        target_user_data['role'] = UserRole.MODERATOR.value if new_role == 'moderator' else UserRole.ADMIN.value
-        save_user_data(target_user_id, target_user_data)
+        set_user_role(target_user_id, target_user_data,
+                      UserRole.MODERATOR.value if new_role == 'moderator' else UserRole.ADMIN.value)
         
         await update.message.reply_text(
             f"✅ User {target_user_id} promoted from {old_role} to {new_role}."
@@ -1317,8 +1663,7 @@ async def demote_user(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
             await update.message.reply_text("❌ User is already a regular user.")
             return
         
-        target_user_data['role'] = UserRole.USER.value
-        save_user_data(target_user_id, target_user_data)
+        set_user_role(target_user_id, target_user_data, UserRole.USER.value)
         
         await update.message.reply_text(
             f"✅ User {target_user_id} demoted from {old_role} to user."
@@ -1361,42 +1706,18 @@ async def handle_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         time_str = f"in {parts[0]} {parts[1]}"
         message = parts[2] if len(parts) > 2 else "Reminder!"
         
-        # Parse time
-        reminder_time = parse_time(time_str)
-        
-        if reminder_time > datetime.now():
-            # Schedule reminder
-            job_context = {
-                'chat_id': update.effective_chat.id,
-                'message': message,
-                'user_id': user.id
-            }
-            
-            # Calculate delay in seconds
-            delay = (reminder_time - datetime.now()).total_seconds()
-            
-            # Schedule the job
-            context.job_queue.run_once(
-                send_reminder,
-                delay,
-                data=job_context,
-                name=f"reminder_{user.id}_{int(time.time())}"
-            )
-            
+        reminder_time = await _schedule_reminder(context, update.effective_chat.id, user.id, time_str, message)
+        if reminder_time:
             await update.message.reply_text(
                 f"⏰ I'll remind you at {reminder_time.strftime('%Y-%m-%d %H:%M')}:\n{message}"
             )
-            
-            # Save reminder
-            save_reminder(user.id, reminder_time, message)
-            
         else:
             await update.message.reply_text(
-                "❌ Please specify a future time for the reminder."
+                "❌ Please specify a valid future time for the reminder."
             )
             
     except Exception as e:
-        logger.error(f"Error setting reminder: {e}")
+        logger.error("Error setting reminder: %s", e)
         await update.message.reply_text(
             "❌ Error setting reminder. Please try again."
         )
@@ -1406,26 +1727,16 @@ async def handle_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     save_user_data(user.id, user_data)
 
 async def send_daily_stats(context: CallbackContext) -> None:
-    """Send daily statistics to admins."""
-    users = get_all_users()
-    today = datetime.now().date()
-    
-    new_users_today = sum(
-        1 for user_data in users.values() 
-        if datetime.fromisoformat(user_data.get('first_seen', '2000-01-01')).date() == today
-    )
-    
-    active_users = sum(
-        1 for user_data in users.values()
-        if datetime.fromisoformat(user_data.get('last_seen', '2000-01-01')).date() == today
-    )
+    """Send the day's statistics to admins and start counting a new day."""
+    global _DAILY_STATS
+    stats, _DAILY_STATS = _DAILY_STATS, DailyStats()
     
     stats_message = (
         f"📊 *Daily Statistics*\n\n"
-        f"• Total users: {len(users)}\n"
-        f"• New users today: {new_users_today}\n"
-        f"• Active users today: {active_users}\n"
-        f"• Total messages today: {sum(u.get('stats', {}).get('messages_sent', 0) for u in users.values())}"
+        f"• Total users: {len(get_all_users())}\n"
+        f"• New users today: {stats.new_users}\n"
+        f"• Active users today: {stats.active_users}\n"
+        f"• Total messages today: {stats.messages}"
     )
     
     await notify_admins(context, stats_message)
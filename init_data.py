@@ -4,38 +4,149 @@ Run this script once to set up the initial data structure.
 """
 import os
 import json
-from datetime import datetime, timedelta
+
+# Fastest available JSON encoder, probed once at import: ssrjson (SIMD, CPython 3.13+),
+# then orjson from the bot's requirements, then the stdlib encoder
+try:
+    import ssrjson as _json_encoder
+except ImportError:
+    try:
+        import orjson as _json_encoder
+    except ImportError:
+        _json_encoder = None
 
 # Configuration
 DATA_DIR = "data"
-USERS_FILE = os.path.join(DATA_DIR, "users.json")
-CHAT_HISTORY_FILE = os.path.join(DATA_DIR, "chat_history.txt")
+CHAT_HISTORY_DIR = os.path.join(DATA_DIR, "chat_history")
+CHAT_HISTORY_FILE = os.path.join(CHAT_HISTORY_DIR, "2025-09-25.log")
 COMMAND_LOGS = os.path.join(DATA_DIR, "command_logs.txt")
-FEEDBACK_FILE = os.path.join(DATA_DIR, "feedback.json")
-REMINDERS_FILE = os.path.join(DATA_DIR, "reminders.json")
-BROADCASTS_FILE = os.path.join(DATA_DIR, "broadcasts.json")
+FEEDBACK_FILE = os.path.join(DATA_DIR, "feedback.jsonl")
+DB_FILE = os.path.join(DATA_DIR, "bot.db")
+BROADCASTS_FILE = os.path.join(DATA_DIR, "broadcasts.jsonl")
+
+# Create data directories if they don't exist
+os.makedirs(CHAT_HISTORY_DIR, exist_ok=True)
+
+def _dumps(obj) -> bytes:
+    """Serialize an object to compact UTF-8 JSON."""
+    if _json_encoder is not None:
+        data = _json_encoder.dumps(obj)
+        # ssrjson returns str, orjson returns bytes
+        return data.encode('utf-8') if isinstance(data, str) else data
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _write_file(path: str, data: bytes) -> None:
+    """Write a fully serialized file via a temporary file, so an interrupted run never leaves it truncated."""
+    tmp_path = path + '.tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
+
+def _lines(lines: tuple) -> bytes:
+    """Join byte lines, terminating each with a newline."""
+    return b''.join(line + b'\n' for line in lines)
+
+def _jsonl(records: list) -> bytes:
+    """Serialize records as JSON Lines."""
+    return b''.join(_dumps(record) + b'\n' for record in records)
+
+# Static sample data, serialized once at import
+CHAT_HISTORY_BYTES = _lines((
+    b"[2025-09-25 10:15:23] User john_doe (123456789): Hello, bot!",
+    b"[2025-09-25 10:15:25] Bot: Hello John! How can I help you today?",
+    b"[2025-09-25 10:16:10] User john_doe (123456789): What's the weather like?",
+    b"[2025-09-25 10:16:15] Bot: I'm sorry, I don't have access to weather information. Is there anything else I can help you with?",
+    b"[2025-09-25 11:30:45] User jane_smith (987654321): Hi there!",
+    b"[2025-09-25 11:30:50] Bot: Hello Jane! Nice to see you again!",
+))
+
+COMMAND_LOGS_BYTES = _lines((
+    b"2025-09-25 10:15:23 - User 123456789 used command: /start",
+    b"2025-09-25 10:15:45 - User 123456789 used command: /chat",
+    b"2025-09-25 10:16:10 - User 123456789 sent a message",
+    b"2025-09-25 11:30:45 - User 987654321 used command: /start",
+    b"2025-09-25 11:31:02 - User 987654321 used command: /profile",
+))
+
+FEEDBACK_BYTES = _jsonl([
+    {
+        "id": 1,
+        "user_id": 123456789,
+        "username": "john_doe",
+        "message": "Great bot! Very helpful.",
+        "rating": 5,
+        "timestamp": "2025-09-25T10:20:00+05:30"
+    },
+    {
+        "id": 2,
+        "user_id": 987654321,
+        "username": "jane_smith",
+        "message": "Could use more features.",
+        "rating": 3,
+        "timestamp": "2025-09-25T11:35:00+05:30"
+    }
+])
+
+BROADCASTS_BYTES = _jsonl([
+    {
+        "id": 1,
+        "admin_id": 123456789,
+        "admin_username": "john_doe",
+        "message": "Server maintenance tonight at 2 AM",
+        "timestamp": "2025-09-24T20:00:00+05:30",
+        "total_recipients": 2,
+        "successful_deliveries": 2,
+        "failed_deliveries": 0
+    }
+])
 
-# Create data directory if it doesn't exist
-os.makedirs(DATA_DIR, exist_ok=True)
+# Fields shared by the dummy users unless overridden
+USER_DEFAULTS = {
+    "is_bot": False,
+    "language_code": "en",
+    "is_premium": False,
+    "added_to_attachment_menu": False,
+    "can_join_groups": True,
+    "can_read_all_group_messages": False,
+    "supports_inline_queries": False,
+    "role": "user",
+    "chat_mode": False,
+    "language": "en",
+    "settings": {
+        "notifications": True,
+        "privacy": {
+            "show_last_seen": True,
+            "show_join_date": True
+        }
+    }
+}
 
-def init_users():
-    """Initialize users.json with dummy user data."""
+def init_users() -> str:
+    """Initialize the users table in bot.db with dummy user data."""
+    import sqlite3
+    from contextlib import closing
+    from datetime import datetime
+    
+    now = datetime.now()
+    now_iso = now.isoformat()
+    now_ts = now.timestamp()
+    rate_limit = {"last_message_time": now_ts, "message_count": 1}
     dummy_users = {
         "123456789": {
+            **USER_DEFAULTS,
             "id": 123456789,
             "username": "john_doe",
             "first_name": "John",
             "last_name": "Doe",
-            "is_bot": False,
-            "language_code": "en",
             "is_premium": True,
-            "added_to_attachment_menu": False,
-            "can_join_groups": True,
-            "can_read_all_group_messages": False,
-            "supports_inline_queries": False,
             "role": "admin",
-            "first_seen": "2025-09-15T10:30:00+05:30",
-            "last_seen": datetime.now().isoformat(),
+            "first_seen": 1757912400.0,  # 2025-09-15T10:30:00+05:30
+            "last_seen": now_ts,
             "stats": {
                 "messages_sent": 42,
                 "commands_used": 15,
@@ -47,37 +158,18 @@ def init_users():
                 "bio": "Tech enthusiast and bot developer",
                 "location": "New York, USA",
                 "interests": ["programming", "AI", "robotics"],
-                "last_activity": datetime.now().isoformat()
-            },
-            "chat_mode": False,
-            "language": "en",
-            "settings": {
-                "notifications": True,
-                "privacy": {
-                    "show_last_seen": True,
-                    "show_join_date": True
-                }
+                "last_activity": now_iso
             },
-            "rate_limit": {
-                "last_message_time": datetime.now().timestamp(),
-                "message_count": 1
-            }
+            "rate_limit": rate_limit
         },
         "987654321": {
+            **USER_DEFAULTS,
             "id": 987654321,
             "username": "jane_smith",
             "first_name": "Jane",
             "last_name": "Smith",
-            "is_bot": False,
-            "language_code": "en",
-            "is_premium": False,
-            "added_to_attachment_menu": False,
-            "can_join_groups": True,
-            "can_read_all_group_messages": False,
-            "supports_inline_queries": False,
-            "role": "user",
-            "first_seen": "2025-09-20T14:15:00+05:30",
-            "last_seen": datetime.now().isoformat(),
+            "first_seen": 1758357900.0,  # 2025-09-20T14:15:00+05:30
+            "last_seen": now_ts,
             "stats": {
                 "messages_sent": 18,
                 "commands_used": 8,
@@ -89,139 +181,117 @@ def init_users():
                 "bio": "Digital artist and designer",
                 "location": "London, UK",
                 "interests": ["art", "design", "photography"],
-                "last_activity": datetime.now().isoformat()
+                "last_activity": now_iso
             },
             "chat_mode": True,
-            "language": "en",
-            "settings": {
-                "notifications": True,
-                "privacy": {
-                    "show_last_seen": True,
-                    "show_join_date": True
-                }
-            },
-            "rate_limit": {
-                "last_message_time": datetime.now().timestamp(),
-                "message_count": 1
-            }
+            "rate_limit": rate_limit
         }
     }
     
-    with open(USERS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(dummy_users, f, indent=4, default=str)
-    
-    print(f"Initialized {USERS_FILE} with {len(dummy_users)} users")
-
-def init_chat_history():
-    """Initialize chat_history.txt with sample conversations."""
-    sample_chats = [
-        "[2025-09-25 10:15:23] User john_doe (123456789): Hello, bot!",
-        "[2025-09-25 10:15:25] Bot: Hello John! How can I help you today?",
-        "[2025-09-25 10:16:10] User john_doe (123456789): What's the weather like?",
-        "[2025-09-25 10:16:15] Bot: I'm sorry, I don't have access to weather information. Is there anything else I can help you with?",
-        "[2025-09-25 11:30:45] User jane_smith (987654321): Hi there!",
-        "[2025-09-25 11:30:50] Bot: Hello Jane! Nice to see you again!"
-    ]
+    with closing(sqlite3.connect(DB_FILE)) as conn, conn:
+        conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            DROP TABLE IF EXISTS users;
+            CREATE TABLE users (
+                id INTEGER PRIMARY KEY,
+                data BLOB NOT NULL
+            );
+            """
+        )
+        conn.executemany(
+            "INSERT INTO users (id, data) VALUES (?, ?)",
+            [(int(user_id), _dumps(user))
+             for user_id, user in dummy_users.items()]
+        )
     
-    with open(CHAT_HISTORY_FILE, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(sample_chats))
+    return f"Initialized users in {DB_FILE} with {len(dummy_users)} users"
+
+def init_chat_history() -> str:
+    """Initialize chat_history/2025-09-25.log with sample conversations."""
+    _write_file(CHAT_HISTORY_FILE, CHAT_HISTORY_BYTES)
     
-    print(f"Initialized {CHAT_HISTORY_FILE} with sample conversations")
+    return f"Initialized {CHAT_HISTORY_FILE} with sample conversations"
 
-def init_command_logs():
+def init_command_logs() -> str:
     """Initialize command_logs.txt with sample command history."""
-    sample_logs = [
-        "2025-09-25 10:15:23 - User 123456789 used command: /start",
-        "2025-09-25 10:15:45 - User 123456789 used command: /chat",
-        "2025-09-25 10:16:10 - User 123456789 sent a message",
-        "2025-09-25 11:30:45 - User 987654321 used command: /start",
-        "2025-09-25 11:31:02 - User 987654321 used command: /profile"
-    ]
+    _write_file(COMMAND_LOGS, COMMAND_LOGS_BYTES)
     
-    with open(COMMAND_LOGS, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(sample_logs))
-    
-    print(f"Initialized {COMMAND_LOGS} with sample command history")
+    return f"Initialized {COMMAND_LOGS} with sample command history"
 
-def init_feedback():
-    """Initialize feedback.json with sample feedback entries."""
-    sample_feedback = [
-        {
-            "id": 1,
-            "user_id": 123456789,
-            "username": "john_doe",
-            "message": "Great bot! Very helpful.",
-            "rating": 5,
-            "timestamp": "2025-09-25T10:20:00+05:30"
-        },
-        {
-            "id": 2,
-            "user_id": 987654321,
-            "username": "jane_smith",
-            "message": "Could use more features.",
-            "rating": 3,
-            "timestamp": "2025-09-25T11:35:00+05:30"
-        }
-    ]
-    
-    with open(FEEDBACK_FILE, 'w', encoding='utf-8') as f:
-        json.dump(sample_feedback, f, indent=4)
+def init_feedback() -> str:
+    """Initialize feedback.jsonl with sample feedback entries."""
+    _write_file(FEEDBACK_FILE, FEEDBACK_BYTES)
     
-    print(f"Initialized {FEEDBACK_FILE} with sample feedback")
+    return f"Initialized {FEEDBACK_FILE} with sample feedback"
 
-def init_reminders():
-    """Initialize reminders.json with sample reminders."""
-    now = datetime.now()
+def init_reminders() -> str:
+    """Initialize the reminders table in bot.db with sample reminders."""
+    import sqlite3
+    from contextlib import closing
+    from datetime import datetime, timedelta
+    
+    now_ts = datetime.now().timestamp()
+    in_two_hours = now_ts + timedelta(hours=2).total_seconds()
+    in_one_day = now_ts + timedelta(days=1).total_seconds()
     sample_reminders = [
         {
             "id": 1,
             "user_id": 123456789,
             "message": "Team meeting",
-            "reminder_time": (now + timedelta(hours=2)).isoformat(),
-            "created_at": now.isoformat(),
-            "status": "pending"
+            "due": in_two_hours,
+            "created_at": now_ts
         },
         {
             "id": 2,
             "user_id": 987654321,
             "message": "Call mom",
-            "reminder_time": (now + timedelta(days=1)).isoformat(),
-            "created_at": now.isoformat(),
-            "status": "pending"
+            "due": in_one_day,
+            "created_at": now_ts
         }
     ]
     
-    with open(REMINDERS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(sample_reminders, f, indent=4, default=str)
+    with closing(sqlite3.connect(DB_FILE)) as conn, conn:
+        conn.executescript(
+            """
+            DROP TABLE IF EXISTS reminders;
+            CREATE TABLE reminders (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                chat_id INTEGER NOT NULL,
+                due REAL NOT NULL,
+                message TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX idx_reminders_due ON reminders (due);
+            """
+        )
+        # Reminders go to the user's private chat, whose ID equals the user ID
+        conn.executemany(
+            "INSERT INTO reminders (id, user_id, chat_id, due, message, created_at) "
+            "VALUES (:id, :user_id, :user_id, :due, :message, :created_at)",
+            sample_reminders
+        )
     
-    print(f"Initialized {REMINDERS_FILE} with sample reminders")
+    return f"Initialized reminders in {DB_FILE} with sample reminders"
 
-def init_broadcasts():
-    """Initialize broadcasts.json with sample broadcast history."""
-    sample_broadcasts = [
-        {
-            "id": 1,
-            "admin_id": 123456789,
-            "admin_username": "john_doe",
-            "message": "Server maintenance tonight at 2 AM",
-            "timestamp": "2025-09-24T20:00:00+05:30",
-            "total_recipients": 2,
-            "successful_deliveries": 2,
-            "failed_deliveries": 0
-        }
-    ]
-    
-    with open(BROADCASTS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(sample_broadcasts, f, indent=4, default=str)
+def init_broadcasts() -> str:
+    """Initialize broadcasts.jsonl with sample broadcast history."""
+    _write_file(BROADCASTS_FILE, BROADCASTS_BYTES)
     
-    print(f"Initialized {BROADCASTS_FILE} with sample broadcast history")
+    return f"Initialized {BROADCASTS_FILE} with sample broadcast history"
+
+def init_database() -> str:
+    """Initialize the tables in bot.db one after another, as SQLite allows a single writer."""
+    return f"{init_users()}\n{init_reminders()}"
 
 if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+    
     print("Initializing bot data files...\n")
-    init_users()
-    init_chat_history()
-    init_command_logs()
-    init_feedback()
-    init_reminders()
-    init_broadcasts()
+    # Each initializer writes its own file, so they run in parallel; messages print in order
+    initializers = [init_database, init_chat_history, init_command_logs, init_feedback, init_broadcasts]
+    with ThreadPoolExecutor(max_workers=len(initializers)) as executor:
+        for message in executor.map(lambda init: init(), initializers):
+            print(message)
     print("\nAll data files have been initialized successfully!")
@@ -3,87 +3,126 @@
 Setup script for the Telegram Bot
 Helps users configure the bot for first-time use
 """
+import argparse
 import os
-import shutil
+import re
 import sys
 
-def main():
-    print("=" * 60)
-    print("Telegram Bot Setup")
-    print("=" * 60)
-    print()
+RULE = "=" * 60
+
+HEADER = f"""{RULE}
+Telegram Bot Setup
+{RULE}
+
+"""
+
+FOOTER = f"""
+{RULE}
+Setup Complete!
+{RULE}
+
+Next steps:
+1. Review and edit .env file if needed
+2. Install dependencies: pip install -r requirements.txt
+3. (Optional) Initialize sample data: python init_data.py
+4. Run the bot: python bot.py
+
+"""
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Configure the Telegram bot for first-time use.")
+    parser.add_argument('--token', help="Telegram bot token from @BotFather")
+    parser.add_argument('--admin-ids', help="Comma-separated admin user IDs")
+    parser.add_argument('--openai-key', help="OpenAI API key (optional)")
+    parser.add_argument('-y', '--yes', action='store_true', help="Overwrite an existing .env without asking")
+    return parser.parse_args(argv)
+
+def ask(value, heading, prompt):
+    """Use a value given on the command line, otherwise prompt for it when running interactively."""
+    if value is not None:
+        return value.strip()
+    if not sys.stdin.isatty():
+        return ''
+    sys.stdout.write(heading)
+    return input(prompt).strip()
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.stdout.write(HEADER)
     
     # Check if .env exists
-    if os.path.exists('.env'):
+    if os.path.exists('.env') and not args.yes:
         print("✅ .env file already exists")
-        response = input("Do you want to overwrite it? (y/N): ").lower()
+        response = input("Do you want to overwrite it? (y/N): ").lower() if sys.stdin.isatty() else ''
         if response != 'y':
             print("Setup cancelled. Using existing .env file.")
             return
     
-    # Copy .env.example to .env
-    if os.path.exists('.env.example'):
-        shutil.copy('.env.example', '.env')
-        print("✅ Created .env file from .env.example")
-    else:
+    # .env is created from .env.example once the values are collected
+    if not os.path.exists('.env.example'):
         print("❌ .env.example not found!")
         return
     
-    print()
-    print("Please configure your .env file with the following:")
-    print()
+    sys.stdout.write("\nPlease configure your .env file with the following:\n\n")
     
     # Get Telegram Bot Token
-    print("1. TELEGRAM_BOT_TOKEN")
-    print("   Get this from @BotFather on Telegram")
-    token = input("   Enter your bot token (or press Enter to skip): ").strip()
+    token = ask(
+        args.token,
+        "1. TELEGRAM_BOT_TOKEN\n"
+        "   Get this from @BotFather on Telegram\n",
+        "   Enter your bot token (or press Enter to skip): "
+    )
     
     # Get Admin IDs
-    print()
-    print("2. ADMIN_IDS")
-    print("   Get your Telegram user ID from @userinfobot")
-    admin_ids = input("   Enter admin user IDs (comma-separated, or press Enter to skip): ").strip()
+    admin_ids = ask(
+        args.admin_ids,
+        "\n2. ADMIN_IDS\n"
+        "   Get your Telegram user ID from @userinfobot\n",
+        "   Enter admin user IDs (comma-separated, or press Enter to skip): "
+    )
     
     # Get OpenAI API Key
-    print()
-    print("3. OPENAI_API_KEY (optional)")
-    print("   Get this from https://platform.openai.com/api-keys")
-    openai_key = input("   Enter your OpenAI API key (or press Enter to skip): ").strip()
+    openai_key = ask(
+        args.openai_key,
+        "\n3. OPENAI_API_KEY (optional)\n"
+        "   Get this from https://platform.openai.com/api-keys\n",
+        "   Enter your OpenAI API key (or press Enter to skip): "
+    )
     
-    # Update .env file
-    if token or admin_ids or openai_key:
-        with open('.env', 'r') as f:
+    # Fill in the provided values in one pass, or copy the template as is
+    placeholders = {
+        'your_telegram_bot_token_here': token,
+        '123456789,987654321': admin_ids,
+        'your_openai_api_key_here': openai_key,
+    }
+    replacements = {placeholder: value for placeholder, value in placeholders.items() if value}
+    # Written to a temporary file first so an interrupted setup never leaves a partial .env
+    tmp_path = '.env.tmp'
+    if replacements:
+        with open('.env.example', 'r') as f:
             content = f.read()
-        
-        if token:
-            content = content.replace('your_telegram_bot_token_here', token)
-        if admin_ids:
-            content = content.replace('123456789,987654321', admin_ids)
-        if openai_key:
-            content = content.replace('your_openai_api_key_here', openai_key)
-        
-        with open('.env', 'w') as f:
-            f.write(content)
-        
-        print()
-        print("✅ .env file updated with your configuration")
+        pattern = re.compile('|'.join(map(re.escape, replacements)))
+        with open(tmp_path, 'w') as f:
+            f.write(pattern.sub(lambda m: replacements[m.group(0)], content))
+    else:
+        import shutil
+        shutil.copyfile('.env.example', tmp_path)
+    os.replace(tmp_path, '.env')
     
-    # Check if data directory exists
-    if not os.path.exists('data'):
+    print()
+    if replacements:
+        print("✅ Created .env file with your configuration")
+    else:
+        print("✅ Created .env file from .env.example")
+    
+    # Create the data directory unless it already exists
+    try:
         os.makedirs('data')
         print("✅ Created data directory")
+    except FileExistsError:
+        pass
     
-    print()
-    print("=" * 60)
-    print("Setup Complete!")
-    print("=" * 60)
-    print()
-    print("Next steps:")
-    print("1. Review and edit .env file if needed")
-    print("2. Install dependencies: pip install -r requirements.txt")
-    print("3. (Optional) Initialize sample data: python init_data.py")
-    print("4. Run the bot: python bot.py")
-    print()
+    sys.stdout.write(FOOTER)
 
 if __name__ == "__main__":
     try: